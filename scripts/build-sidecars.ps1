@@ -103,6 +103,13 @@ if (Test-Path $SidekickDir) {
         Write-Host "Installing requirements..." -ForegroundColor Gray
         python -m pip install -r requirements.txt | Out-Null
         
+        # AOT-compile the omnibox hot path; PyInstaller picks up omnibox.pyd over omnibox.py
+        Write-Host "Compiling omnibox with mypyc..." -ForegroundColor Gray
+        python -m mypyc omnibox.py | Out-Null
+        if ($LASTEXITCODE -ne 0) {
+            Write-Warning "mypyc build failed, bundling the pure-Python omnibox"
+        }
+        
         # Build command using PyInstaller
         Write-Host "Running PyInstaller build..." -ForegroundColor Gray
         
@@ -115,11 +122,7 @@ if (Test-Path $SidekickDir) {
             "--windowed",
             "--name", "LuminaSidekick",
             "--collect-all", "llama_cpp",
-            "--copy-metadata=imageio",
-            "--copy-metadata=moviepy",
-            "--hidden-import=moviepy",
-            "--hidden-import=proglog",
-            "--hidden-import=tqdm",
+            "--collect-all", "imageio_ffmpeg",
             "--add-data", "main.py$($Sep)."
         )
 
@@ -97,6 +97,10 @@ if [ -d "$SIDEKICK_DIR" ]; then
     echo "Installing requirements..."
     "$PYTHON_CMD" -m pip install -r requirements.txt > /dev/null
     
+    # AOT-compile the omnibox hot path; PyInstaller picks up the extension over omnibox.py
+    echo "Compiling omnibox with mypyc..."
+    "$PYTHON_CMD" -m mypyc omnibox.py > /dev/null || echo "Warning: mypyc build failed, bundling the pure-Python omnibox"
+    
     # Build command using PyInstaller
     echo "Running PyInstaller build..."
     
@@ -110,11 +114,7 @@ if [ -d "$SIDEKICK_DIR" ]; then
         "--windowed"
         "--name" "LuminaSidekick"
         "--collect-all" "llama_cpp"
-        "--copy-metadata=imageio"
-        "--copy-metadata=moviepy"
-        "--hidden-import=moviepy"
-        "--hidden-import=proglog"
-        "--hidden-import=tqdm"
+        "--collect-all" "imageio_ffmpeg"
         "--add-data" "main.py${SEP}."
     )
 
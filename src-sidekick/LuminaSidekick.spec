@@ -1,14 +1,13 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_all
-from PyInstaller.utils.hooks import copy_metadata
 
 datas = [('main.py', '.')]
 binaries = []
-hiddenimports = ['moviepy', 'proglog', 'tqdm']
-datas += copy_metadata('imageio')
-datas += copy_metadata('moviepy')
+hiddenimports = []
 tmp_ret = collect_all('llama_cpp')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+tmp_ret = collect_all('imageio_ffmpeg')
+datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
 
 a = Analysis(
@@ -1 +1,2 @@
-pyinstaller --noconfirm --onefile --windowed --name "LuminaSidekick" --icon="..\src-tauri\icons\icon.ico" --collect-all "llama_cpp" --copy-metadata=imageio --copy-metadata=moviepy --hidden-import="moviepy" --hidden-import="proglog" --hidden-import="tqdm" --add-data "main.py;." main.py
\ No newline at end of file
+python -m mypyc omnibox.py
+pyinstaller --noconfirm --onefile --windowed --name "LuminaSidekick" --icon="..\src-tauri\icons\icon.ico" --collect-all "llama_cpp" --collect-all "imageio_ffmpeg" --add-data "main.py;." main.py
\ No newline at end of file
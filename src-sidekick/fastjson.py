@@ -0,0 +1,37 @@
+"""
+JSON codec for the stdin/stdout protocol: orjson when installed, stdlib json otherwise.
+`dumps` always returns UTF-8 bytes so callers can write it straight to a binary stream.
+"""
+from typing import Any, Callable
+
+# Declared once so both branches type-check against the same names (omnibox.py is built with mypyc)
+HAS_ORJSON: bool
+loads: Callable[[bytes | str], Any]
+dumps: Callable[[Any], bytes]
+JSONDecodeError: type[ValueError]
+DECODE_ERRORS: tuple[type[BaseException], ...]
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+    loads = orjson.loads
+    dumps = orjson.dumps
+    JSONDecodeError = orjson.JSONDecodeError
+    DECODE_ERRORS = (orjson.JSONDecodeError,)
+except ImportError:
+    import json
+
+    HAS_ORJSON = False
+    # Same compact, non-ASCII-escaping output orjson produces
+    _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+    loads = json.loads # Accepts bytes directly, no decode step needed
+    dumps = _json_dumps
+    JSONDecodeError = json.JSONDecodeError
+    # orjson reports invalid UTF-8 and too-deep nesting as JSONDecodeError, json does not:
+    # UnicodeDecodeError is caught as a ValueError, RecursionError separately
+    DECODE_ERRORS = (ValueError, RecursionError)
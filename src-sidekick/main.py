@@ -1,25 +1,39 @@
 import sys
 import os
+import importlib.util
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 import psutil
-import json
+import re
+import selectors
+import shutil
+import subprocess
+import threading
+from collections import deque
+from contextlib import contextmanager
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from functools import lru_cache
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QFrame, QSizePolicy, QPushButton)
-from PySide6.QtCore import QTimer, Qt, QThread, Signal, QRectF
-from PySide6.QtGui import QPainter, QColor, QPen, QFont, QDragEnterEvent, QDropEvent
-from moviepy import VideoFileClip
+from PySide6.QtCore import Qt, QThread, QThreadPool, QRunnable, QObject, Signal
+from PySide6.QtGui import QDragEnterEvent, QDropEvent
+
+import fastjson
+import omnibox
+from widgets import CircularProgress
 
 # Check for Local LLM support
-try:
-    from llama_cpp import Llama
-    HAS_LOCAL_LLM = True
-except ImportError:
-    HAS_LOCAL_LLM = False
+# Only probe for the package here: importing llama_cpp loads the native llama library,
+# which would delay the first paint for users who never go offline. ask_local imports it.
+HAS_LOCAL_LLM = importlib.util.find_spec("llama_cpp") is not None
+
+# PyAV (libav in-process) extracts audio when no ffmpeg binary is bundled or on PATH; imported on use
+HAS_PYAV = importlib.util.find_spec("av") is not None
 
 # --- 🧠 Brain (Hybrid Intelligence Layer) ---
 class Brain:
@@ -52,6 +66,8 @@ class Brain:
         }
     }
 
+    API_URL = "https://openrouter.ai/api/v1/chat/completions"
+
     SYSTEM_PROMPT = """
     You are Lumina Sidekick, an advanced AI assistant integrated into the Lumina Web Browser.
     Your goal is to help the user with browsing, coding, and general tasks.
@@ -64,6 +80,52 @@ class Brain:
         self.active_local_model = self.MODELS["local_efficient"]
         self.offline_mode = False
         self.local_llm = None # Lazy load
+        self._session = self._create_session()
+        self._read_env()
+        # Request template reused by ask_cloud; the stdin listener is its only caller, one prompt at a time
+        self._system_message = {"role": "system", "content": self.SYSTEM_PROMPT}
+        self._payload = {
+            "model": self.active_cloud_model["id"],
+            "messages": [],
+            "temperature": 0.7,
+            "max_tokens": 4096
+        }
+
+    def _read_env(self):
+        # Read once: the key and the headers derived from it are constant between prompts
+        self._api_key = os.getenv("OPENROUTER_API_KEY") or ""
+        self._headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://lumina.app", 
+            "X-Title": "Lumina Sidekick"
+        }
+
+    def reload_env(self):
+        """Re-reads .env and the environment, e.g. after rotating OPENROUTER_API_KEY."""
+        load_dotenv(override=True)
+        self._read_env()
+
+    @staticmethod
+    def _create_session():
+        """Keep-alive session so follow-up prompts reuse the TCP+TLS connection to OpenRouter."""
+        session = requests.Session()
+        # A completion POST is not idempotent and ask_cloud runs on the stdin thread: only retry
+        # when the prompt never reached the model (connect errors, 429/502/503), and never wait
+        # out a read timeout or a Retry-After a second time
+        retry = Retry(
+            total=2,
+            connect=2,
+            read=False, # Re-raise the ReadTimeout as is, no second attempt
+            status=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503],
+            allowed_methods=frozenset(["POST"]), # Status retries on POST are opt-in
+            respect_retry_after_header=False,
+            raise_on_status=False # Hand the last error response back to ask_cloud
+        )
+        session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retry))
+        return session
 
     def think(self, query, context=None):
         """
@@ -76,43 +138,29 @@ class Brain:
 
     def ask_cloud(self, query, context=None):
         """Sends query to OpenRouter API."""
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
+        if not self._api_key:
             return "Error: OPENROUTER_API_KEY not found in environment. Please set it in .env file."
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://lumina.app", 
-            "X-Title": "Lumina Sidekick"
-        }
-        
-        messages = [
-            {"role": "system", "content": self.SYSTEM_PROMPT}
-        ]
-        
+        # Only the per-prompt slots of the request template change between calls
+        messages = [self._system_message]
         if context:
             messages.append({"role": "system", "content": f"Context: {context}"})
-            
         messages.append({"role": "user", "content": query})
 
-        payload = {
-            "model": self.active_cloud_model["id"],
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 4096
-        }
+        payload = self._payload
+        payload["model"] = self.active_cloud_model["id"]
+        payload["messages"] = messages
 
         try:
             print(f"🧠 [Cloud Brain] Sending request to {self.active_cloud_model['name']}...", flush=True)
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
+            response = self._session.post(
+                self.API_URL,
+                headers=self._headers,
+                data=fastjson.dumps(payload), # Content-Type is set in _headers
+                timeout=(5, 30) # (connect, read)
             )
             response.raise_for_status()
-            data = response.json()
+            data = fastjson.loads(response.content)
             if "choices" in data and len(data["choices"]) > 0:
                 return data["choices"][0]["message"]["content"]
             else:
@@ -134,6 +182,7 @@ class Brain:
              
              print(f"🧠 [Local Brain] Loading model from {model_path}...", flush=True)
              try:
+                 from llama_cpp import Llama
                  self.local_llm = Llama(
                      model_path=model_path,
                      n_ctx=4096,
@@ -159,174 +208,663 @@ class Brain:
         except Exception as e:
              return f"Local Brain Error: {str(e)}"
 
-# --- 🎨 Modern Circular Progress Bar ---
-class CircularProgress(QWidget):
-    def __init__(self, title, color_hex, parent=None):
-        super().__init__(parent)
-        self.value = 0
-        self.title = title
-        self.color = QColor(color_hex)
-        self.setMinimumSize(100, 120)
-
-    def set_value(self, val):
-        self.value = val
-        self.update()
-
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Boyutlar
-        width = self.width()
-        height = self.height()
-        size = min(width, height) - 20
-        rect = QRectF((width - size) / 2, (height - size) / 2 - 10, size, size)
-
-        # 1. Arka Plan Çemberi
-        painter.setPen(QPen(QColor("#333333"), 8, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap))
-        painter.drawEllipse(rect)
-
-        # 2. İlerleme Yayı (Progress Arc)
-        pen = QPen(self.color, 8, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap)
-        painter.setPen(pen)
-        # 360 * value / 100, -90 derece (saat 12 yönünden başla)
-        span_angle = int(-360 * self.value / 100 * 16)
-        painter.drawArc(rect, 90 * 16, span_angle)
-
-        # 3. Ortadaki Yüzde Metni
-        painter.setPen(QColor("#FFFFFF"))
-        painter.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
-        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, f"{int(self.value)}%")
-
-        # 4. Alt Başlık (CPU, RAM vb.)
-        painter.setPen(QColor("#AAAAAA"))
-        painter.setFont(QFont("Segoe UI", 10))
-        text_rect = QRectF(0, height - 25, width, 20)
-        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, self.title)
-        
-        painter.end()
+# --- 🎞️ FFmpeg Helpers ---
+# Windows: don't flash a console window for every ffmpeg spawned by the windowed build
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+# GeForce drivers limit concurrent NVENC encode sessions per system
+_NVENC_MAX_SESSIONS = 3
+# The converter pool runs several workers, so the cap is enforced process-wide, one slot per session
+_nvenc_slots = threading.Semaphore(_NVENC_MAX_SESSIONS)
+_nvenc_claim = threading.Lock() # Multi-slot claims go one at a time: two batches can't each hold half
+# Files per ffmpeg run: one process works on all of its inputs at once, and its argv has to stay
+# far below Windows' 32K command-line limit. libx264 outputs each bring frame threads and lookahead.
+_BATCH_MAX_JOBS = 8
+_X264_BATCH_MAX_JOBS = 2
+# Audio codecs an MP4 container takes as-is (None: the source has no audio track)
+_MP4_COPY_AUDIO = frozenset(["aac", "mp3", "ac3", "eac3", "alac", None])
+# How much of each input to pre-read into the page cache before ffmpeg opens it
+_PREFETCH_BYTES = 64 * 1024 * 1024
+
+@lru_cache(maxsize=None)
+def _ffmpeg_exe():
+    """Resolves the ffmpeg binary: system PATH first, then the copy bundled with imageio-ffmpeg."""
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+@lru_cache(maxsize=None)
+def _ffprobe_exe():
+    """ffprobe from PATH or next to ffmpeg; imageio-ffmpeg doesn't ship one, so this may be None."""
+    exe = shutil.which("ffprobe")
+    if exe:
+        return exe
+    ffmpeg = _ffmpeg_exe()
+    if ffmpeg:
+        sibling = os.path.join(os.path.dirname(ffmpeg), "ffprobe" + (".exe" if os.name == "nt" else ""))
+        if os.path.isfile(sibling):
+            return sibling
+    return None
+
+def _probe_media(path):
+    """
+    One ffprobe call per input: {"duration": seconds|None, "video": codec|None, "audio": codec|None}
+    for the first stream of each kind, parsed from ffmpeg's own input summary when there is no
+    ffprobe. "probed" is False (and the rest None) when the file couldn't be read, so a None codec
+    only means "no such stream" when it is True.
+    """
+    info = {"probed": False, "duration": None, "video": None, "audio": None}
+    ffprobe = _ffprobe_exe()
+    if not ffprobe:
+        return _probe_with_ffmpeg(path, info)
+    try:
+        out = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration:stream=codec_type,codec_name",
+             "-of", "json", path],
+            capture_output=True, timeout=10, creationflags=_NO_WINDOW
+        ).stdout
+        data = fastjson.loads(out)
+        info["duration"] = float(data.get("format", {}).get("duration", 0)) or None
+        for stream in data.get("streams", []):
+            kind = stream.get("codec_type")
+            if kind in ("video", "audio") and info[kind] is None:
+                info[kind] = stream.get("codec_name")
+        info["probed"] = True
+    except (OSError, subprocess.SubprocessError, ValueError):
+        pass
+    return info
+
+# `ffmpeg -i` input summary lines, anchored so metadata values can't match
+_BANNER_DURATION = re.compile(r"^\s*Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)", re.MULTILINE)
+_BANNER_STREAM = re.compile(r"^\s*Stream #0:\d+\S*: (Video|Audio): (\w+)(.*)$", re.MULTILINE)
 
-# --- 🔄 Video Converter Thread ---
-class ConverterThread(QThread):
+def _probe_with_ffmpeg(path, info):
+    """
+    Fallback for builds without ffprobe (imageio-ffmpeg ships only ffmpeg): `ffmpeg -i <src>`
+    with no output prints the same input summary to stderr and exits right after opening.
+    """
+    ffmpeg = _ffmpeg_exe()
+    if not ffmpeg:
+        return info
+    try:
+        err = subprocess.run(
+            [ffmpeg, "-hide_banner", "-nostdin", "-i", path],
+            capture_output=True, timeout=10, creationflags=_NO_WINDOW
+        ).stderr.decode("utf-8", "replace")
+    except (OSError, subprocess.SubprocessError):
+        return info
+    if "Input #0" not in err:
+        return info # ffmpeg couldn't open it; the conversion will report why
+
+    duration = _BANNER_DURATION.search(err)
+    if duration:
+        hours, minutes, seconds = duration.groups()
+        info["duration"] = (int(hours) * 3600 + int(minutes) * 60 + float(seconds)) or None
+    for kind, codec, rest in _BANNER_STREAM.findall(err):
+        kind = kind.lower()
+        if kind == "video" and "(attached pic)" in rest:
+            continue # Cover art, not the movie
+        if info[kind] is None:
+            info[kind] = codec
+    info["probed"] = True
+    return info
+
+def _can_remux_to_mp4(info):
+    """H.264 video with MP4-compatible (or no) audio only needs a container change."""
+    return info["video"] == "h264" and info["audio"] in _MP4_COPY_AUDIO
+
+def _batch_duration(jobs, probes):
+    """The longest input bounds a batch's out_time, None if any duration is unknown."""
+    durations = [probes[src]["duration"] for src, _ in jobs]
+    if not durations or None in durations:
+        return None
+    return max(durations)
+
+def _remove_outputs(jobs):
+    """Deletes the outputs of a failed run: with -y ffmpeg has already truncated every one of them."""
+    for _, dst in jobs:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+
+def _prefetch_input(path):
+    """
+    Starts asynchronous kernel read-ahead of the input's head (Linux/macOS only).
+    FADV_SEQUENTIAL would only tune our own fd, ffmpeg opens its own; WILLNEED fills the
+    shared page cache, so ffmpeg's first reads of a cold file don't stall on the disk.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return # ffmpeg will report the real error
+    try:
+        os.posix_fadvise(fd, 0, _PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+@contextmanager
+def _nvenc_sessions(count):
+    """Blocks until `count` NVENC sessions are free in this process and holds them for the block."""
+    with _nvenc_claim:
+        for _ in range(count):
+            _nvenc_slots.acquire()
+    try:
+        yield
+    finally:
+        for _ in range(count):
+            _nvenc_slots.release()
+
+@lru_cache(maxsize=None)
+def _detect_nvenc():
+    """
+    Checks once whether ffmpeg can encode with h264_nvenc.
+    Most builds list the encoder even without an NVIDIA GPU, so a one-frame test encode confirms the driver works.
+    """
+    ffmpeg = _ffmpeg_exe()
+    if not ffmpeg:
+        return False
+    try:
+        encoders = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True, timeout=10, creationflags=_NO_WINDOW
+        ).stdout
+        if b"h264_nvenc" not in encoders:
+            return False
+        probe = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+             "-frames:v", "1", "-c:v", "h264_nvenc", "-f", "null", "-"],
+            capture_output=True, timeout=15, creationflags=_NO_WINDOW
+        )
+        return probe.returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+# --- 🔄 Video Converter Worker ---
+class ConversionCancelled(Exception):
+    """Raised inside a worker once its cancel event is set; deliberately not a RuntimeError/OSError."""
+
+class ConverterSignals(QObject):
+    # QRunnable is not a QObject, so the worker emits through this holder
     progress_updated = Signal(str) # Durum mesajı
     finished = Signal()
 
-    def __init__(self, file_path):
+class ConverterWorker(QRunnable):
+    def __init__(self, files, signals, cancel):
         super().__init__()
-        self.file_path = file_path
+        self.files = list(files)
+        self.signals = signals # Shared by all workers, see LuminaSidekick.converter_signals
+        self.cancel = cancel # threading.Event, set when the window closes
 
     def run(self):
         try:
-            self.progress_updated.emit("Dönüştürme başlıyor...")
-            
+            self.signals.progress_updated.emit("Dönüştürme başlıyor...")
+
             # Basit bir mantık: mp4 ise mp3 yap, değilse mp4 yap
-            file_name, ext = os.path.splitext(self.file_path)
-            output_path = f"{file_name}_converted.mp3" if ext == ".mp4" else f"{file_name}_converted.mp4"
-            
-            clip = VideoFileClip(self.file_path)
-            
-            if ext == ".mp4":
-                self.progress_updated.emit("MP4 -> MP3 Çıkarılıyor...")
-                clip.audio.write_audiofile(output_path, logger=None) # Logger none to avoid console spam
-            else:
-                self.progress_updated.emit("Video formatına dönüştürülüyor...")
-                clip.write_videofile(output_path, codec="libx264", logger=None)
-            
-            clip.close()
-            self.progress_updated.emit(f"Tamamlandı: {os.path.basename(output_path)}")
-        
+            audio_jobs, video_jobs = [], []
+            for file_path in self.files:
+                file_name, ext = os.path.splitext(file_path)
+                if ext == ".mp4":
+                    audio_jobs.append((file_path, f"{file_name}_converted.mp3"))
+                else:
+                    video_jobs.append((file_path, f"{file_name}_converted.mp4"))
+
+            ffmpeg = _ffmpeg_exe()
+            if not ffmpeg:
+                if video_jobs or not HAS_PYAV:
+                    raise RuntimeError("ffmpeg bulunamadı (PATH veya imageio-ffmpeg)")
+                # Audio-only drop: decode/encode in-process, no binary to spawn
+                failed = []
+                for job in audio_jobs:
+                    self.signals.progress_updated.emit(f"MP4 -> MP3 Çıkarılıyor (PyAV)... {os.path.basename(job[0])}")
+                    try:
+                        self._extract_audio_pyav(*job)
+                    except ConversionCancelled:
+                        _remove_outputs([job])
+                        raise
+                    except Exception as e: # av.FFmpegError and friends, one per file
+                        _remove_outputs([job])
+                        failed.append((job, str(e)))
+                self._report(audio_jobs, failed)
+                return
+
+            for file_path in self.files:
+                _prefetch_input(file_path)
+            probes = {file_path: _probe_media(file_path) for file_path in self.files}
+            failed = [] # (job, reason) pairs, reported after everything else has run
+
+            # No audio track means no MP3; keep such files out of the batch instead of failing it
+            silent = [job for job in audio_jobs if probes[job[0]]["probed"] and probes[job[0]]["audio"] is None]
+            failed += [(job, "Ses akışı yok") for job in silent]
+            audio_jobs = [job for job in audio_jobs if job not in silent]
+
+            # One ffmpeg process per batch: N inputs mapped to N outputs, so process startup
+            # and codec/CUDA initialization are paid once per drop instead of once per file.
+            if audio_jobs:
+                self.signals.progress_updated.emit(f"MP4 -> MP3 Çıkarılıyor... ({len(audio_jobs)} dosya)")
+                # Only the audio stream is mapped, so the video track is never decoded; an MP3
+                # track is copied into the .mp3 as is, anything else re-encodes audio only
+                failed += self._run_batch(ffmpeg, audio_jobs, _BATCH_MAX_JOBS, [], lambda i, src: [
+                    "-map", f"{i}:a:0", "-vn", "-c:a",
+                    *(["copy"] if probes[src]["audio"] == "mp3" else ["libmp3lame", "-q:a", "2"])
+                ], probes)
+
+            # Sources that already carry H.264 are remuxed with stream copy: no decode, no encode
+            remux_jobs = [job for job in video_jobs if _can_remux_to_mp4(probes[job[0]])]
+            if remux_jobs:
+                self.signals.progress_updated.emit(f"MP4 kapsayıcısına aktarılıyor... ({len(remux_jobs)} dosya)")
+                failed += self._run_batch(ffmpeg, remux_jobs, _BATCH_MAX_JOBS, [], lambda i, src: [
+                    "-map", f"{i}:v:0", "-map", f"{i}:a:0?", "-c", "copy"
+                ], probes)
+            encode_jobs = [job for job in video_jobs if job not in remux_jobs]
+
+            if encode_jobs:
+                # Software decode and libx264 share ffmpeg's frame pool in one process, no raw pipes
+                x264_args = lambda i, src: [
+                    "-map", f"{i}:v:0", "-map", f"{i}:a:0?",
+                    "-c:v", "libx264", "-preset", "veryfast", "-threads", "0", "-c:a", "aac"
+                ]
+                if _detect_nvenc():
+                    self.signals.progress_updated.emit(f"Video formatına dönüştürülüyor (NVENC)... ({len(encode_jobs)} dosya)")
+                    # NVDEC decodes into CUDA surfaces that h264_nvenc consumes directly: frames never
+                    # leave VRAM, so there is no decoder -> Python -> encoder copy to eliminate
+                    nvenc_input = ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+                    nvenc_args = lambda i, src: [
+                        "-map", f"{i}:v:0", "-map", f"{i}:a:0?",
+                        "-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23", "-c:a", "aac"
+                    ]
+                    # Every output is its own NVENC session, see _nvenc_sessions
+                    for start in range(0, len(encode_jobs), _NVENC_MAX_SESSIONS):
+                        batch = encode_jobs[start:start + _NVENC_MAX_SESSIONS]
+                        # Another worker's batch may hold sessions right now: wait for ours to be free
+                        with _nvenc_sessions(len(batch)):
+                            error = self._try_batch(ffmpeg, batch, nvenc_input, nvenc_args, probes)
+                        if error is not None:
+                            # NVDEC decodes some sources h264_nvenc rejects (10-bit HEVC/VP9 arrive as p010)
+                            self.signals.progress_updated.emit("NVENC başarısız, libx264 ile yeniden deneniyor...")
+                            failed += self._run_batch(ffmpeg, batch, _X264_BATCH_MAX_JOBS, [], x264_args, probes)
+                else:
+                    self.signals.progress_updated.emit(f"Video formatına dönüştürülüyor... ({len(encode_jobs)} dosya)")
+                    failed += self._run_batch(ffmpeg, encode_jobs, _X264_BATCH_MAX_JOBS, [], x264_args, probes)
+
+            self._report(audio_jobs + video_jobs, failed)
+
+        except ConversionCancelled:
+            self.signals.progress_updated.emit("İptal edildi")
         except Exception as e:
-            self.progress_updated.emit(f"Hata: {str(e)}")
+            self.signals.progress_updated.emit(f"Hata: {str(e)}")
         finally:
-            self.finished.emit()
+            self.signals.finished.emit()
+
+    def _report(self, jobs, failed):
+        """Reports each failed job on its own, then the outputs that were written."""
+        for (src, _), reason in failed:
+            self.signals.progress_updated.emit(f"Hata: {os.path.basename(src)}: {reason}")
+        failed_jobs = [job for job, _ in failed]
+        outputs = [os.path.basename(dst) for src, dst in jobs if (src, dst) not in failed_jobs]
+        if outputs:
+            self.signals.progress_updated.emit(f"Tamamlandı: {', '.join(outputs)}")
+
+    @staticmethod
+    def _batch_cmd(ffmpeg, jobs, input_args, output_args):
+        """
+        Builds one ffmpeg command that reads every job's input and writes every job's output.
+        `output_args(i, src)` gets the input's index in this command and its source path.
+        """
+        # -nostats drops the \r-terminated stats line, _run_ffmpeg adds the -progress target
+        cmd = [ffmpeg, "-hide_banner", "-y", "-loglevel", "error", "-nostats"]
+        for src, _ in jobs:
+            cmd += input_args + ["-i", src]
+        for i, (src, dst) in enumerate(jobs):
+            cmd += output_args(i, src) + [dst]
+        return cmd
+
+    def _run_batch(self, ffmpeg, jobs, group_size, input_args, output_args, probes):
+        """
+        Converts `jobs` in ffmpeg runs of up to `group_size` files each. If a run fails, one bad
+        input must not sink the rest: its truncated outputs are removed and that group is retried
+        one file at a time. Returns the jobs that still failed as (job, reason) pairs.
+        """
+        failed = []
+        for start in range(0, len(jobs), group_size):
+            group = jobs[start:start + group_size]
+            error = self._try_batch(ffmpeg, group, input_args, output_args, probes)
+            if error is None:
+                continue
+            if len(group) == 1:
+                failed.append((group[0], error))
+                continue
+            for job in group:
+                error = self._try_batch(ffmpeg, [job], input_args, output_args, probes)
+                if error is not None:
+                    failed.append((job, error))
+        return failed
+
+    def _try_batch(self, ffmpeg, jobs, input_args, output_args, probes):
+        """One ffmpeg run over `jobs`; on failure removes its truncated outputs and returns the error."""
+        if self.cancel.is_set():
+            raise ConversionCancelled()
+        try:
+            self._run_ffmpeg(self._batch_cmd(ffmpeg, jobs, input_args, output_args), _batch_duration(jobs, probes))
+        except (RuntimeError, OSError) as e: # OSError: Popen itself failed, e.g. argv too long
+            _remove_outputs(jobs)
+            return str(e)
+        except ConversionCancelled:
+            _remove_outputs(jobs) # Killed mid-run, the outputs are truncated
+            raise
+        return None
+
+    def _run_ffmpeg(self, cmd, duration=None):
+        """Runs ffmpeg and relays its `-progress` key=value stream through `progress_updated`."""
+        errors = deque(maxlen=20)
+        popen_args = dict(stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          creationflags=_NO_WINDOW)
+
+        if os.name == "posix":
+            # Progress gets a pipe of its own, so stderr only carries errors and needs no parsing
+            read_fd, write_fd = os.pipe()
+            progress = os.fdopen(read_fd, "rb")
+            try:
+                proc = subprocess.Popen([cmd[0], "-progress", f"pipe:{write_fd}"] + cmd[1:],
+                                        pass_fds=(write_fd,), **popen_args)
+            except BaseException:
+                progress.close()
+                raise
+            finally:
+                os.close(write_fd)
+            # Popen's context manager closes stderr and reaps the child on every exit path
+            with proc, progress:
+                try:
+                    # Drain stderr concurrently, a chatty decoder would otherwise fill the pipe and stall ffmpeg
+                    drain = threading.Thread(target=lambda: errors.extend(proc.stderr), daemon=True)
+                    drain.start()
+                    self._relay_progress(progress, duration)
+                    drain.join()
+                except BaseException:
+                    proc.kill() # Don't leave ffmpeg encoding into a half-written output
+                    raise
+            errors = [raw.decode("utf-8", "replace").strip() for raw in errors]
+        else:
+            # Windows can't pass extra fds to a child: progress shares stderr with the errors
+            with subprocess.Popen([cmd[0], "-progress", "pipe:2"] + cmd[1:], **popen_args) as proc:
+                try:
+                    self._relay_progress(proc.stderr, duration, errors)
+                except BaseException:
+                    proc.kill()
+                    raise
+
+        if proc.returncode != 0:
+            errors = [e for e in errors if e]
+            raise RuntimeError(errors[-1] if errors else f"ffmpeg çıkış kodu {proc.returncode}")
+
+    def _extract_audio_pyav(self, src, dst):
+        """Decodes only the first audio stream of `src` and encodes it to MP3 with libmp3lame."""
+        import av
+
+        with av.open(src) as ic:
+            # Check before opening dst, a silent input must not leave an empty .mp3 behind
+            if not ic.streams.audio:
+                raise RuntimeError("Ses akışı yok")
+            with av.open(dst, "w", format="mp3") as oc:
+                a_in = ic.streams.audio[0]
+                a_out = oc.add_stream("libmp3lame", rate=a_in.rate)
+                a_out.bit_rate = 192000
+                duration = ic.duration / av.time_base if ic.duration else None
+
+                last_percent = -1
+                # demux() with one stream selected: video packets are skipped, never decoded
+                for packet in ic.demux(a_in):
+                    if self.cancel.is_set():
+                        raise ConversionCancelled()
+                    for frame in packet.decode():
+                        for out_packet in a_out.encode(frame):
+                            oc.mux(out_packet)
+                        if duration and frame.time is not None:
+                            percent = min(100, int(frame.time * 100 / duration))
+                            if percent != last_percent:
+                                last_percent = percent
+                                self.signals.progress_updated.emit(f"İşleniyor: %{percent}")
+                for out_packet in a_out.encode(None): # Flush the encoder's delayed frames
+                    oc.mux(out_packet)
+
+    def _relay_progress(self, stream, duration, errors=None):
+        """Parses ffmpeg progress lines; anything else goes to `errors` when given."""
+        last_percent = -1
+        for raw in stream:
+            # ffmpeg writes a progress block every 0.5 s, so a cancel is noticed within that;
+            # raising here makes _run_ffmpeg kill the process
+            if self.cancel.is_set():
+                raise ConversionCancelled()
+            key, sep, value = raw.partition(b"=")
+            if not sep or b" " in key:
+                if errors is not None:
+                    errors.append(raw.decode("utf-8", "replace").strip())
+            elif key == b"out_time_ms":
+                value = value.strip()
+                if not value.isdigit():
+                    continue # "N/A" until the first packet is muxed
+                seconds = int(value) / 1_000_000 # ffmpeg reports microseconds despite the name
+                if duration:
+                    percent = min(100, int(seconds * 100 / duration))
+                    if percent != last_percent:
+                        last_percent = percent
+                        self.signals.progress_updated.emit(f"İşleniyor: %{percent}")
+                else:
+                    self.signals.progress_updated.emit(f"İşleniyor: {seconds:.1f} sn")
 
 # --- 👂 Stdin Listener (Rust Communication) ---
+def _write_line(payload):
+    """Writes one already-encoded protocol line to stdout's binary layer, skipping print()'s str round-trip."""
+    out = sys.stdout
+    if out is None: # Windowed build launched without a pipe
+        return
+    out.flush() # Keep ordering with any text still pending from print()
+    out.buffer.write(payload + b"\n")
+    out.buffer.flush()
+
+
 class StdinListener(QThread):
     ai_response = Signal(str)
 
+    QUERY_PREFIXES = ("ask ", "sor ")
+
     def __init__(self, brain_instance):
         super().__init__()
         self.brain = brain_instance
+        self._stop = threading.Event()
+        # Message "type" -> handler, looked up once per line instead of an if/elif chain
+        self._handlers = {
+            "omnibox_query": self._on_omnibox_query,
+            "command": self._on_command,
+            "query": self._on_query,
+        }
+
+    def stop(self):
+        """Asks the read loop to exit; it checks the flag at least once per select timeout."""
+        self._stop.set()
 
     def run(self):
-        while True:
-            try:
-                line = sys.stdin.readline()
-                if not line:
-                    break
-                line = line.strip()
-                if not line:
+        if sys.stdin is None: # Windowed build launched without a pipe
+            return
+        # Raw os.read() on the fd skips the sys.stdin text layer (and its lock) entirely
+        fd = sys.stdin.fileno()
+        chunks = self._pipe_chunks(fd) if sys.platform == "win32" else self._selector_chunks(fd)
+        if chunks is None:
+            # Not pollable (console, regular file, /dev/null): plain blocking line reads
+            self._run_blocking()
+            return
+
+        buffer = b""
+        for chunk in chunks:
+            buffer += chunk
+            # Dispatch every complete line, carry the partial remainder over
+            *lines, buffer = buffer.split(b"\n")
+            self._dispatch_lines(lines)
+        if buffer.strip(): # Final line without a trailing newline, readline() used to deliver it too
+            self._dispatch_lines([buffer])
+
+    def _selector_chunks(self, fd):
+        sel = selectors.DefaultSelector()
+        try:
+            sel.register(fd, selectors.EVENT_READ)
+        except (OSError, ValueError): # epoll refuses regular files and /dev/null with EPERM
+            sel.close()
+            return None
+
+        def chunks():
+            with sel:
+                while not self._stop.is_set():
+                    if not sel.select(timeout=1.0):
+                        continue
+                    chunk = os.read(fd, 65536)
+                    if not chunk:
+                        return # EOF: the host closed our stdin
+                    yield chunk
+        return chunks()
+
+    def _pipe_chunks(self, fd):
+        # select() only takes sockets on Windows; poll the anonymous pipe with PeekNamedPipe
+        import ctypes
+        import msvcrt
+        from ctypes import wintypes
+
+        peek_named_pipe = ctypes.windll.kernel32.PeekNamedPipe
+        handle = wintypes.HANDLE(msvcrt.get_osfhandle(fd))
+        available = wintypes.DWORD()
+
+        def peek():
+            return peek_named_pipe(handle, None, 0, None, ctypes.byref(available), None)
+
+        if not peek():
+            return None # Console or file handle, not a pipe
+
+        def chunks():
+            idle = 0.005
+            while not self._stop.is_set():
+                if not peek():
+                    return # Broken pipe: the host went away
+                if not available.value:
+                    # Back off while idle, snap back to 5 ms as soon as keystrokes flow
+                    self._stop.wait(idle)
+                    idle = min(idle * 2, 0.05)
                     continue
-                
-                try:
-                    data = json.loads(line)
-                    if data.get("type") == "omnibox_query":
-                        self.handle_omnibox_query(data.get("query", ""))
-                    elif data.get("type") == "command":
-                        cmd = data.get("command", "")
-                        if cmd.startswith("switch_model"):
-                            model_key = cmd.split(" ")[1]
-                            if model_key in self.brain.MODELS:
-                                self.brain.active_cloud_model = self.brain.MODELS[model_key]
-                                print(f"🧠 [Brain] Switched to {self.brain.active_cloud_model['name']}", flush=True)
-                    elif data.get("type") == "query":
-                         query = data.get("content", "")
-                         context = data.get("context", None) # Support context passing
-                         if query.lower().startswith("ask ") or query.lower().startswith("sor "):
-                             clean_query = query.split(" ", 1)[1]
-                             response = self.brain.think(clean_query, context)
-                             print(json.dumps({"type": "ai_response", "content": response}), flush=True)
-
-                except json.JSONDecodeError:
-                    pass
+                idle = 0.005
+                chunk = os.read(fd, min(available.value, 65536))
+                if not chunk:
+                    return
+                yield chunk
+        return chunks()
+
+    def _run_blocking(self):
+        while not self._stop.is_set():
+            try:
+                line = sys.stdin.buffer.readline()
+            except Exception:
+                break
+            if not line:
+                break
+            self._dispatch_lines([line])
+
+    @staticmethod
+    def _parse(line):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            data = fastjson.loads(line)
+        except fastjson.DECODE_ERRORS:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _dispatch_lines(self, lines):
+        messages = [data for data in map(self._parse, lines) if data is not None]
+        # A burst of keystrokes can arrive in one read: answer only the newest omnibox query,
+        # responses to the older ones would be stale before the host even renders them
+        latest_omnibox = -1
+        for i, data in enumerate(messages):
+            if data.get("type") == "omnibox_query":
+                latest_omnibox = i
+
+        for i, data in enumerate(messages):
+            msg_type = data.get("type")
+            if msg_type == "omnibox_query" and i != latest_omnibox:
+                continue
+            # Anything a message can trigger, type lookup included, must not end the listener
+            try:
+                handler = self._handlers.get(msg_type)
+                if handler:
+                    handler(data)
             except Exception:
                 pass
 
+    def _on_omnibox_query(self, data):
+        self.handle_omnibox_query(data.get("query", ""))
+
+    def _on_command(self, data):
+        cmd = data.get("command", "")
+        if cmd.startswith("switch_model"):
+            model_key = cmd.split(" ")[1]
+            if model_key in self.brain.MODELS:
+                self.brain.active_cloud_model = self.brain.MODELS[model_key]
+                print(f"🧠 [Brain] Switched to {self.brain.active_cloud_model['name']}", flush=True)
+        elif cmd == "reload_env":
+            self.brain.reload_env()
+            print("🧠 [Brain] Environment reloaded", flush=True)
+
+    def _on_query(self, data):
+        query = data.get("content", "")
+        context = data.get("context", None) # Support context passing
+        # Lowercase only the 4-char prefix, prompts can be long pastes
+        if query[:4].lower() in self.QUERY_PREFIXES:
+            response = self.brain.think(query[4:], context)
+            _write_line(fastjson.dumps({"type": "ai_response", "content": response}))
+
     def handle_omnibox_query(self, query):
-        # Basic Omnibox logic
+        # Basic Omnibox logic (see omnibox.py, AOT-compiled in release builds)
         if not query: return
-        
-        suggestions = []
+        _write_line(omnibox.encode_results(query))
 
-        # 1. Math Calculation (Lumina Calculator)
-        try:
-            # Safe basic math check (digits, operators, parens)
-            clean_query = query.replace("=", "").strip()
-            if any(c in "+-*/" for c in clean_query) and all(c in "0123456789+-*/(). " for c in clean_query):
-                # Safe eval
-                result = eval(clean_query, {"__builtins__": None}, {})
-                suggestions.append({
-                    "title": f"= {result}",
-                    "description": "Calculator Result",
-                    "url": "javascript:void(0)", 
-                    "icon": "calculator",
-                    "type": "calculator"
-                })
-        except:
-            pass
-        
-        # 2. Unit Conversion (Simple) - e.g., "55 usd to try"
-        # For now, let's just let the Brain handle complex queries, or add simple regex later if needed.
-        
-        if "." in query and " " not in query:
-             suggestions.append({"title": f"Go to {query}", "url": query if query.startswith("http") else f"http://{query}", "icon": "globe", "type": "navigation"})
-        
-        suggestions.append({"title": f"Google Search: {query}", "url": f"https://www.google.com/search?q={query}", "icon": "search", "type": "search"})
-        
-        # Brain Fallback
-        if len(query) > 5:
-            suggestions.append({
-                "title": f"Ask AI: {query}",
-                "url": f"lumina-app://ai-chat?q={query}",
-                "icon": "cpu",
-                "type": "ai_query"
-            })
-
-        response = {"suggestions": suggestions}
-        print(f"OMNIBOX_RESULTS: {json.dumps(response)}", flush=True)
+# --- 📊 System Stats Sampler ---
+class StatsSampler(QThread):
+    # All three percentages in one queued signal: one GUI-thread hop per tick instead of three
+    sampled = Signal(float, float, float) # cpu, ram, disk
+
+    DISK_SAMPLE_TICKS = 30 # 1 tick = 1 s
+
+    def __init__(self, disk_path='/'):
+        super().__init__()
+        self.disk_path = disk_path
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        # Disk usage moves on a minute scale; statfs it every DISK_SAMPLE_TICKS ticks only
+        disk = psutil.disk_usage(self.disk_path).percent
+        tick = 0
+        while not self._stop.is_set():
+            # Blocks for the sampling period and measures CPU over exactly that window,
+            # which makes this loop its own timer
+            cpu = psutil.cpu_percent(interval=1.0)
+            ram = psutil.virtual_memory().percent
+            tick += 1
+            if tick % self.DISK_SAMPLE_TICKS == 0:
+                disk = psutil.disk_usage(self.disk_path).percent
+            self.sampled.emit(cpu, ram, disk)
 
 # --- 🚀 Ana Uygulama ---
 class LuminaSidekick(QMainWindow):
+    LUA_BRIDGE_LINE = b'LUA: return "Bridge Successful: " .. os.date("%Y-%m-%d %H:%M:%S")'
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Lumina Sidekick")
@@ -341,7 +879,7 @@ class LuminaSidekick(QMainWindow):
                 border-radius: 12px; 
                 background-color: #1e1e1e; 
             }
-            QWidget#DropArea:hover {
+            QWidget#DropArea:hover, QWidget#DropArea[dragging="true"] {
                 border-color: #05B8CC;
                 background-color: #252525;
             }
@@ -378,6 +916,7 @@ class LuminaSidekick(QMainWindow):
         # 3. Converter Drop Area
         self.drop_area = QWidget()
         self.drop_area.setObjectName("DropArea")
+        self.drop_area.setProperty("dragging", False)
         drop_layout = QVBoxLayout(self.drop_area)
         
         drop_label = QLabel("Drag & Drop Video File")
@@ -401,41 +940,76 @@ class LuminaSidekick(QMainWindow):
         self.lua_btn.clicked.connect(self.fire_lua_bridge)
         self.main_layout.addWidget(self.lua_btn)
 
-        # Timer for system stats
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_stats)
-        self.timer.start(1000)
+        # System stats are sampled off the GUI thread, psutil calls never block the event loop
+        self.stats_sampler = StatsSampler()
+        self.stats_sampler.sampled.connect(self.update_stats)
+        self.stats_sampler.start()
 
         self.setAcceptDrops(True)
 
+        # Conversion pool: each job is an ffmpeg process, more than a couple at once
+        # just fight over disk bandwidth and NVENC sessions
+        self.converter_pool = QThreadPool(self)
+        self.converter_pool.setMaxThreadCount(max(1, min(2, (os.cpu_count() or 2) // 2)))
+        self.converter_pool.setExpiryTimeout(-1) # Keep idle workers alive, no thread spawn per drop
+        # One signal holder for every job, connected once instead of per drop
+        self.converter_signals = ConverterSignals()
+        self.converter_signals.progress_updated.connect(self.on_conversion_status)
+        self.converter_cancel = threading.Event()
+
         # Start Stdin Listener
         self.stdin_listener = StdinListener(self.brain)
         self.stdin_listener.start()
 
+    def closeEvent(self, event):
+        self.stats_sampler.stop()
+        self.stdin_listener.stop()
+        self.stats_sampler.wait(1500)
+        self.stdin_listener.wait(1500)
+        # Queued drops never start, running ones kill their ffmpeg instead of encoding on windowless
+        self.converter_pool.clear()
+        self.converter_cancel.set()
+        self.converter_pool.waitForDone(5000)
+        super().closeEvent(event)
+
     def fire_lua_bridge(self):
-        print('LUA: return "Bridge Successful: " .. os.date("%Y-%m-%d %H:%M:%S")', flush=True)
+        _write_line(self.LUA_BRIDGE_LINE)
 
-    def update_stats(self):
-        self.cpu_circle.set_value(psutil.cpu_percent())
-        self.ram_circle.set_value(psutil.virtual_memory().percent)
-        self.disk_circle.set_value(psutil.disk_usage('/').percent)
+    def update_stats(self, cpu, ram, disk):
+        # Only the rings whose integer percent moved get repainted
+        self.cpu_circle.maybe_set(int(cpu))
+        self.ram_circle.maybe_set(int(ram))
+        self.disk_circle.maybe_set(int(disk))
 
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasUrls():
             event.accept()
-            self.drop_area.setStyleSheet("border: 2px dashed #05B8CC; border-radius: 12px; background-color: #252525; color: #FFF;")
+            self._set_dragging(True)
         else:
             event.ignore()
 
+    def dragLeaveEvent(self, event):
+        self._set_dragging(False)
+
+    def _set_dragging(self, dragging):
+        # Toggle the [dragging] rule of the window stylesheet; re-polishing restyles just this
+        # widget instead of parsing a fresh stylesheet on every drag event
+        if self.drop_area.property("dragging") == dragging:
+            return
+        self.drop_area.setProperty("dragging", dragging)
+        style = self.drop_area.style()
+        style.unpolish(self.drop_area)
+        style.polish(self.drop_area)
+
     def dropEvent(self, event: QDropEvent):
-        self.drop_area.setStyleSheet("border: 2px dashed #444; border-radius: 12px; background-color: #1e1e1e; color: #888;")
+        self._set_dragging(False)
         files = [u.toLocalFile() for u in event.mimeData().urls()]
+        files = [f for f in files if f] # Non-local URLs map to ""
         
         if files:
-            file_path = files[0]
-            self.start_conversion(file_path)
+            self.start_conversion(files)
 
-    def start_conversion(self, file_path):
+    def start_conversion(self, files: list[str]):
         # Placeholder for status label since I removed it from the condensed logic or it wasn't initialized in init
         # Wait, the original code had self.status_label?
         # Looking at original read output... I DON'T SEE self.status_label initialization in __init__!
@@ -446,11 +1020,14 @@ class LuminaSidekick(QMainWindow):
         # Maybe I missed it in `Read` output?
         # Let's assume it was missing and add it to avoid crash.
         pass # I will skip status label logic for now to ensure it runs, or add it back.
-        self.worker = ConverterThread(file_path)
-        self.worker.progress_updated.connect(lambda s: print(f"STATUS: {s}")) # Fallback
-        self.worker.start()
+        self.converter_pool.start(ConverterWorker(files, self.converter_signals, self.converter_cancel))
+
+    def on_conversion_status(self, status):
+        print(f"STATUS: {status}", flush=True) # Fallback
 
 if __name__ == "__main__":
+    # One GL context for every CircularProgress instead of one per widget; must precede QApplication
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     window = LuminaSidekick()
     window.show()
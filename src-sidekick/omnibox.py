@@ -0,0 +1,133 @@
+"""
+Lumina Omnibox suggestion builder.
+
+Runs on every keystroke in the address bar, so it is kept free of Qt imports and fully
+type-annotated: the build scripts AOT-compile it with mypyc (`python -m mypyc omnibox.py`)
+and the pure-Python module is used unchanged when that step is skipped.
+"""
+import ast
+import operator
+from functools import lru_cache
+from typing import Callable, Final, Union
+from urllib.parse import quote_plus
+
+import fastjson
+
+RESULTS_PREFIX: Final = b"OMNIBOX_RESULTS: "
+GOOGLE_SEARCH_URL: Final = "https://www.google.com/search?q="
+AI_CHAT_URL: Final = "lumina-app://ai-chat?q="
+_MATH_OPS: Final = frozenset("+-*/") # Calculator trigger characters
+
+Number = Union[int, float]
+
+# Calculator grammar: numbers, + - * / // ** and parentheses, nothing that can name or call anything
+_BIN_OPS: Final[dict[type, Callable[[Number, Number], Number]]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+}
+_UNARY_OPS: Final[dict[type, Callable[[Number], Number]]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+# Integer results are capped by size, not by exponent: "(((9**64)**64)**64)**64" nests small
+# exponents into a huge power. Estimating bit lengths up front keeps the stdin thread responsive.
+_MAX_RESULT_BITS: Final = 4096
+
+# Suggestion templates in wire key order; dict.copy() clones the table without rehashing the
+# fixed keys, then only title/url are stored per keystroke
+_CALC_TMPL: Final[dict[str, str]] = {"title": "", "description": "Calculator Result", "url": "javascript:void(0)", "icon": "calculator", "type": "calculator"}
+_NAV_TMPL: Final[dict[str, str]] = {"title": "", "url": "", "icon": "globe", "type": "navigation"}
+_SEARCH_TMPL: Final[dict[str, str]] = {"title": "", "url": "", "icon": "search", "type": "search"}
+_AI_TMPL: Final[dict[str, str]] = {"title": "", "url": "", "icon": "cpu", "type": "ai_query"}
+
+
+@lru_cache(maxsize=256)
+def _parse_expr(expr: str) -> ast.expr:
+    # The host re-sends the same text on backspace/refocus; those keystrokes skip the parser
+    return ast.parse(expr, mode="eval").body
+
+
+def _eval_node(node: ast.expr) -> Number:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    elif isinstance(node, ast.BinOp):
+        left = _eval_node(node.left)
+        right = _eval_node(node.right)
+        if isinstance(node.op, ast.Pow):
+            # Float powers overflow (OverflowError) instead of growing; int ** int is what can grow unbounded.
+            # left >= 2**(bits - 1), so this lower bound is within 2x of the result's real size
+            if isinstance(left, int) and isinstance(right, int) and right > 0 \
+                    and (abs(left).bit_length() - 1) * right > _MAX_RESULT_BITS:
+                raise ValueError("result too large")
+            return operator.pow(left, right)
+        if isinstance(node.op, ast.Mult) and isinstance(left, int) and isinstance(right, int) \
+                and abs(left).bit_length() + abs(right).bit_length() > _MAX_RESULT_BITS:
+            raise ValueError("result too large")
+        bin_op = _BIN_OPS.get(type(node.op))
+        if bin_op is not None:
+            return bin_op(left, right)
+    elif isinstance(node, ast.UnaryOp):
+        unary_op = _UNARY_OPS.get(type(node.op))
+        if unary_op is not None:
+            return unary_op(_eval_node(node.operand))
+    raise ValueError("unsupported expression")
+
+
+def safe_eval(expr: str) -> Number:
+    """Evaluates a plain arithmetic expression; raises SyntaxError/ValueError/ArithmeticError otherwise."""
+    return _eval_node(_parse_expr(expr))
+
+
+def build_suggestions(query: str) -> list[dict[str, str]]:
+    # Percent-encode once: a raw query breaks the URL on spaces, "&", "#", "+"...
+    q_enc = quote_plus(query)
+    search = _SEARCH_TMPL.copy()
+    search["title"] = "Google Search: " + query
+    search["url"] = GOOGLE_SEARCH_URL + q_enc
+    if len(query) < 2:
+        # First keystroke: no expression or domain fits in one character
+        return [search]
+
+    suggestions: list[dict[str, str]] = []
+
+    # 1. Math Calculation (Lumina Calculator)
+    try:
+        clean_query = query.replace("=", "").strip()
+        if not _MATH_OPS.isdisjoint(clean_query): # One C-level pass, no generator frame
+            # AST walk over arithmetic nodes only, no eval()
+            result = safe_eval(clean_query)
+            calc = _CALC_TMPL.copy()
+            calc["title"] = f"= {result}"
+            suggestions.append(calc)
+    except:
+        pass
+
+    # 2. Unit Conversion (Simple) - e.g., "55 usd to try"
+    # For now, let's just let the Brain handle complex queries, or add simple regex later if needed.
+
+    if "." in query and " " not in query:
+         nav = _NAV_TMPL.copy()
+         nav["title"] = f"Go to {query}"
+         nav["url"] = query if query.startswith("http") else f"http://{query}"
+         suggestions.append(nav)
+
+    suggestions.append(search)
+
+    # Brain Fallback
+    if len(query) > 5:
+        ai = _AI_TMPL.copy()
+        ai["title"] = "Ask AI: " + query
+        ai["url"] = AI_CHAT_URL + q_enc
+        suggestions.append(ai)
+
+    return suggestions
+
+
+def encode_results(query: str) -> bytes:
+    """Builds the complete `OMNIBOX_RESULTS:` protocol line (without the trailing newline)."""
+    return RESULTS_PREFIX + fastjson.dumps({"suggestions": build_suggestions(query)})
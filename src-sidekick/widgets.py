@@ -0,0 +1,184 @@
+"""
+Shared Qt widgets for Lumina Sidekick (PySide6).
+"""
+import os
+from functools import lru_cache
+
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import (QPainter, QColor, QPen, QFont, QPixmap, QStaticText, QSurfaceFormat, QTransform,
+                           QOpenGLContext, QOffscreenSurface)
+
+# The rings paint the main window color themselves (QOpenGLWidget is opaque)
+SURFACE_COLOR = "#121212"
+# Set to force the raster rings, e.g. on a machine whose GL driver renders garbage
+NO_GL_ENV = "LUMINA_NO_GL"
+
+
+@lru_cache(maxsize=None)
+def gl_available():
+    """
+    Whether a GL context can actually be created here. RDP sessions, VMs, the offscreen platform and
+    GPUs without a working driver fail this, and a QOpenGLWidget there paints nothing at all.
+    Needs the QApplication, so it is checked on the first ring rather than at import.
+    """
+    if os.getenv(NO_GL_ENV) or os.getenv("QT_OPENGL") == "software":
+        return False # Software GL is slower than the raster engine for three small rings
+    surface = QOffscreenSurface()
+    surface.create()
+    context = QOpenGLContext()
+    if not (context.create() and surface.isValid() and context.makeCurrent(surface)):
+        return False
+    context.doneCurrent()
+    return True
+
+
+# --- 🎨 Modern Circular Progress Bar ---
+class _RingBase:
+    """Value handling and drawing shared by the GL and raster rings; see CircularProgress."""
+    # "0%".."100%" laid out once with _value_font and shared by every ring
+    _percent_texts: list[QStaticText] = []
+
+    def _init_ring(self, title, color_hex):
+        self.value = 0
+        self.title = title
+        self.color = QColor(color_hex)
+        self.setMinimumSize(100, 120)
+
+        # Paint resources are constant, build them once instead of on every paintEvent
+        self._bg_pen = QPen(QColor("#333333"), 8, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap)
+        self._arc_pen = QPen(self.color, 8, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap)
+        self._value_font = QFont("Segoe UI", 12, QFont.Weight.Bold)
+        self._title_font = QFont("Segoe UI", 10)
+        self._surface = QColor(SURFACE_COLOR)
+        self._white = QColor("#FFFFFF")
+        self._gray = QColor("#AAAAAA")
+        self._bg_pixmap: QPixmap | None = None # Built on first paint, see _render_background
+        self._bg_key = None
+        self._ring = QRectF() # Follows the widget size, set with the background
+
+        if not _RingBase._percent_texts:
+            # Shaping happens here once; painting only draws the prepared glyph runs
+            for i in range(101):
+                text = QStaticText(f"{i}%")
+                text.prepare(QTransform(), self._value_font)
+                _RingBase._percent_texts.append(text)
+
+        self._last_int_value = -1
+        self._set_int(0) # Seeds the arc span and label for the initial 0%
+
+    def set_value(self, val):
+        self.value = val
+        self._set_int(int(val))
+
+    def maybe_set(self, val_i):
+        """Takes an already-truncated percentage and invalidates the widget only when it changed."""
+        self.value = val_i
+        return self._set_int(val_i)
+
+    def _set_int(self, val_i):
+        # Only the integer percentage is displayed, skip the repaint when it didn't change
+        if val_i == self._last_int_value:
+            return False
+        self._last_int_value = val_i
+        # Arc span and label follow the value, not the frame: derive them here, once per change
+        # 360 * value / 100, -90 derece (saat 12 yönünden başla)
+        self._span_angle = int(-360 * val_i / 100 * 16)
+        self._percent_text = self._percent_texts[min(max(val_i, 0), 100)]
+        self.update()
+        return True
+
+    def _ring_rect(self):
+        # Boyutlar
+        width = self.width()
+        height = self.height()
+        size = min(width, height) - 20
+        return QRectF((width - size) / 2, (height - size) / 2 - 10, size, size)
+
+    def _render_background(self, key):
+        # The background ring and the title never change, rasterize them once per size/DPR
+        dpr = key[2]
+        pixmap = QPixmap(self.size() * dpr)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # 1. Arka Plan Çemberi
+        self._ring = self._ring_rect()
+        painter.setPen(self._bg_pen)
+        painter.drawEllipse(self._ring)
+
+        # 4. Alt Başlık (CPU, RAM vb.)
+        painter.setPen(self._gray)
+        painter.setFont(self._title_font)
+        text_rect = QRectF(0, self.height() - 25, self.width(), 20)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, self.title)
+
+        painter.end()
+        self._bg_pixmap = pixmap
+        self._bg_key = key
+
+    def _paint_ring(self):
+        # Moving to a screen with another scale factor changes the DPR without a resize
+        key = (self.width(), self.height(), self.devicePixelRatioF())
+        if self._bg_pixmap is None or key != self._bg_key:
+            self._render_background(key)
+
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self._surface)
+        painter.drawPixmap(0, 0, self._bg_pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        rect = self._ring
+
+        # 2. İlerleme Yayı (Progress Arc)
+        painter.setPen(self._arc_pen)
+        painter.drawArc(rect, 90 * 16, self._span_angle)
+
+        # 3. Ortadaki Yüzde Metni
+        painter.setPen(self._white)
+        painter.setFont(self._value_font)
+        text = self._percent_text
+        size = text.size()
+        center = rect.center()
+        painter.drawStaticText(QPointF(center.x() - size.width() / 2, center.y() - size.height() / 2), text)
+
+        painter.end()
+
+
+class GLCircularProgress(_RingBase, QOpenGLWidget):
+    """
+    Rendered through Qt's OpenGL paint engine, so the antialiased ring and arc are rasterized
+    on the GPU. Run the app with Qt.AA_ShareOpenGLContexts so all rings share one GL context.
+    QOpenGLWidget already paints straight into its own FBO; a QQuickPaintedItem(FramebufferObject)
+    hosted in a QQuickWidget would do the same, plus a QML scene and one more FBO composite.
+    """
+    def __init__(self, title, color_hex, parent=None):
+        super().__init__(parent)
+        # Multisampling gives the GL paint engine its antialiasing
+        fmt = QSurfaceFormat.defaultFormat()
+        fmt.setSamples(4)
+        self.setFormat(fmt)
+        self._init_ring(title, color_hex)
+
+    def paintGL(self):
+        self._paint_ring()
+
+
+class RasterCircularProgress(_RingBase, QWidget):
+    """The same ring on the raster paint engine, for machines without usable OpenGL."""
+    def __init__(self, title, color_hex, parent=None):
+        super().__init__(parent)
+        self._init_ring(title, color_hex)
+
+    def paintEvent(self, event):
+        self._paint_ring()
+
+
+def CircularProgress(title, color_hex, parent=None):
+    """Builds the GL ring where a GL context works, the raster ring otherwise."""
+    cls = GLCircularProgress if gl_available() else RasterCircularProgress
+    return cls(title, color_hex, parent)
@@ -372,8 +372,10 @@ async fn request_omnibox_suggestions(
     let mut suggestions = Vec::new();
 
     // Add favorites that match query
+    // Lowercase the query once per keystroke, not twice per favorite
+    let query_lower = query.to_lowercase();
     for fav in favorites {
-        if query.is_empty() || fav.title.to_lowercase().contains(&query.to_lowercase()) || fav.url.to_lowercase().contains(&query.to_lowercase()) {
+        if query_lower.is_empty() || fav.title.to_lowercase().contains(&query_lower) || fav.url.to_lowercase().contains(&query_lower) {
             suggestions.push(serde_json::json!({
                 "title": fav.title,
                 "url": fav.url,